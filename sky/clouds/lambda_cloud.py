@@ -1,7 +1,8 @@
 """Lambda Cloud."""
+import functools
 import json
 import typing
-from typing import Dict, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from sky import clouds
 from sky.clouds import service_catalog
@@ -15,6 +16,29 @@ if typing.TYPE_CHECKING:
 _CREDENTIAL_FILES = [
     'lambda_keys',
 ]
+_CREDENTIAL_FILE_MOUNTS = {
+    f'~/.lambda_cloud/{filename}': f'~/.lambda_cloud/{filename}'
+    for filename in _CREDENTIAL_FILES
+}
+
+# Set once check_credentials() succeeds in this process, to skip repeating the
+# list_instances() round trip. Failures are not cached so that users can fix
+# their credentials and retry.
+_credentials_validated = False
+
+# Memoized service catalog lookups, keyed by (method name, *args). The
+# optimizer queries the same instance types over and over, and the Lambda
+# catalog is read only once per process (see lambda_catalog._df), so the
+# cached entries never go stale.
+_CATALOG_CACHE: Dict[Tuple[Any, ...], Any] = {}
+
+
+def _cached_catalog_lookup(method_name: str, *args) -> Any:
+    key = (method_name,) + args
+    if key not in _CATALOG_CACHE:
+        method = getattr(service_catalog, method_name)
+        _CATALOG_CACHE[key] = method(*args, clouds='lambda')
+    return _CATALOG_CACHE[key]
 
 
 @clouds.CLOUD_REGISTRY.register
@@ -53,12 +77,15 @@ class Lambda(clouds.Cloud):
         del accelerators, zone  # unused
         if use_spot:
             return []
-        regions = service_catalog.get_region_zones_for_instance_type(
-            instance_type, use_spot, 'lambda')
+        regions = _cached_catalog_lookup('get_region_zones_for_instance_type',
+                                         instance_type, use_spot)
 
         if region is not None:
-            regions = [r for r in regions if r.name == region]
-        return regions
+            region_by_name = {r.name: r for r in regions}
+            r = region_by_name.get(region)
+            return [] if r is None else [r]
+        # Return a copy so callers cannot mutate the cached entry.
+        return list(regions)
 
     @classmethod
     def zones_provision_loop(
@@ -85,11 +112,8 @@ class Lambda(clouds.Cloud):
                                      use_spot: bool,
                                      region: Optional[str] = None,
                                      zone: Optional[str] = None) -> float:
-        return service_catalog.get_hourly_cost(instance_type,
-                                               use_spot=use_spot,
-                                               region=region,
-                                               zone=zone,
-                                               clouds='lambda')
+        return _cached_catalog_lookup('get_hourly_cost', instance_type,
+                                      use_spot, region, zone)
 
     def accelerators_to_hourly_cost(self,
                                     accelerators: Dict[str, int],
@@ -124,32 +148,38 @@ class Lambda(clouds.Cloud):
         cls,
         instance_type: str,
     ) -> Optional[Dict[str, int]]:
-        return service_catalog.get_accelerators_from_instance_type(
-            instance_type, clouds='lambda')
+        acc_dict = _cached_catalog_lookup(
+            'get_accelerators_from_instance_type', instance_type)
+        # Return a copy so callers cannot mutate the cached entry.
+        return None if acc_dict is None else dict(acc_dict)
 
     @classmethod
     def get_vcpus_mem_from_instance_type(
         cls,
         instance_type: str,
     ) -> Tuple[Optional[float], Optional[float]]:
-        return service_catalog.get_vcpus_mem_from_instance_type(instance_type,
-                                                                clouds='lambda')
+        return _cached_catalog_lookup('get_vcpus_mem_from_instance_type',
+                                      instance_type)
 
     @classmethod
     def get_zone_shell_cmd(cls) -> Optional[str]:
         return None
 
+    @classmethod
+    @functools.lru_cache(maxsize=1024)  # Called per candidate resource.
+    def _get_custom_resources(cls, instance_type: str) -> Optional[str]:
+        """Returns the Ray custom resources JSON string of an instance type."""
+        acc_dict = cls.get_accelerators_from_instance_type(instance_type)
+        if acc_dict is None:
+            return None
+        return json.dumps(acc_dict, separators=(',', ':'))
+
     def make_deploy_resources_variables(
             self, resources: 'resources_lib.Resources', region: 'clouds.Region',
             zones: Optional[List['clouds.Zone']]) -> Dict[str, Optional[str]]:
         assert zones is None, 'Lambda does not support zones.'
 
-        r = resources
-        acc_dict = self.get_accelerators_from_instance_type(r.instance_type)
-        if acc_dict is not None:
-            custom_resources = json.dumps(acc_dict, separators=(',', ':'))
-        else:
-            custom_resources = None
+        custom_resources = self._get_custom_resources(resources.instance_type)
 
         return {
             'instance_type': resources.instance_type,
@@ -169,9 +199,13 @@ class Lambda(clouds.Cloud):
 
         def _make(instance_list):
             resource_list = []
+            # Resources.copy() re-validates each candidate; this is kept
+            # because validation derives per-instance-type state, and its
+            # catalog lookups are memoized above.
+            cloud = Lambda()
             for instance_type in instance_list:
                 r = resources.copy(
-                    cloud=Lambda(),
+                    cloud=cloud,
                     instance_type=instance_type,
                     # Setting this to None as Lambda doesn't separately bill /
                     # attach the accelerators.  Billed as part of the VM type.
@@ -194,23 +228,24 @@ class Lambda(clouds.Cloud):
                 return (_make([default_instance_type]), [])
 
         assert len(accelerators) == 1, resources
-        acc, acc_count = list(accelerators.items())[0]
-        (instance_list, fuzzy_candidate_list
-        ) = service_catalog.get_instance_type_for_accelerator(
-            acc,
-            acc_count,
-            use_spot=resources.use_spot,
-            cpus=resources.cpus,
-            memory=resources.memory,
-            region=resources.region,
-            zone=resources.zone,
-            clouds='lambda')
+        acc, acc_count = next(iter(accelerators.items()))
+        (instance_list, fuzzy_candidate_list) = _cached_catalog_lookup(
+            'get_instance_type_for_accelerator', acc, acc_count,
+            resources.cpus, resources.memory, resources.use_spot,
+            resources.region, resources.zone)
+        # Copy so callers cannot mutate the cached entry.
+        if instance_list is not None:
+            instance_list = list(instance_list)
+        fuzzy_candidate_list = list(fuzzy_candidate_list)
         if instance_list is None:
             return ([], fuzzy_candidate_list)
         return (_make(instance_list), fuzzy_candidate_list)
 
     @classmethod
     def check_credentials(cls) -> Tuple[bool, Optional[str]]:
+        global _credentials_validated
+        if _credentials_validated:
+            return True, None
         try:
             lambda_utils.LambdaCloudClient().list_instances()
         except (AssertionError, KeyError, lambda_utils.LambdaCloudError):
@@ -220,13 +255,12 @@ class Lambda(clouds.Cloud):
                            'to generate API key and add the line\n    '
                            '  api_key = [YOUR API KEY]\n    '
                            'to ~/.lambda_cloud/lambda_keys')
+        _credentials_validated = True
         return True, None
 
     def get_credential_file_mounts(self) -> Dict[str, str]:
-        return {
-            f'~/.lambda_cloud/{filename}': f'~/.lambda_cloud/{filename}'
-            for filename in _CREDENTIAL_FILES
-        }
+        # Copy so callers cannot mutate the module-level mapping.
+        return dict(_CREDENTIAL_FILE_MOUNTS)
 
     @classmethod
     def get_current_user_identity(cls) -> Optional[List[str]]:
@@ -234,21 +268,20 @@ class Lambda(clouds.Cloud):
         return None
 
     def instance_type_exists(self, instance_type: str) -> bool:
-        return service_catalog.instance_type_exists(instance_type, 'lambda')
+        return _cached_catalog_lookup('instance_type_exists', instance_type)
 
     def validate_region_zone(self, region: Optional[str], zone: Optional[str]):
-        return service_catalog.validate_region_zone(region,
-                                                    zone,
-                                                    clouds='lambda')
+        return _cached_catalog_lookup('validate_region_zone', region, zone)
 
     def accelerator_in_region_or_zone(self,
                                       accelerator: str,
                                       acc_count: int,
                                       region: Optional[str] = None,
                                       zone: Optional[str] = None) -> bool:
-        return service_catalog.accelerator_in_region_or_zone(
-            accelerator, acc_count, region, zone, 'lambda')
+        return _cached_catalog_lookup('accelerator_in_region_or_zone',
+                                      accelerator, acc_count, region, zone)
 
     @classmethod
     def regions(cls) -> List['clouds.Region']:
-        return service_catalog.regions(clouds='lambda')
+        # Return a copy so callers cannot mutate the cached entry.
+        return list(_cached_catalog_lookup('regions'))
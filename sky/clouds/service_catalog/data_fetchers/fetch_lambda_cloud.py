@@ -5,7 +5,7 @@ Usage:
                                  [--api-key-path API_KEY_PATH]
 
 If neither --api-key nor --api-key-path are provided, this script will parse
-`~/.lambda/lambda_keys` to look for Lambda API key.
+`~/.lambda_cloud/lambda_keys` to look for Lambda API key.
 """
 import argparse
 import csv
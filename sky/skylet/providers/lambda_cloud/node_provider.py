@@ -1,8 +1,8 @@
 import logging
 import os
 import time
-from threading import RLock
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from ray.autoscaler.node_provider import NodeProvider
 from ray.autoscaler.tags import (
@@ -26,23 +26,14 @@ _TAG_PATH_PREFIX = '~/.sky/generated/lambda_cloud/metadata'
 _REMOTE_SSH_KEY_NAME = '~/.lambda_cloud/ssh_key_name'
 _REMOTE_RAY_SSH_KEY = '~/ray_bootstrap_key.pem'
 _REMOTE_RAY_YAML = '~/ray_bootstrap_config.yaml'
+# The Ray autoscaler queries many nodes per update; reuse one list_instances()
+# response for queries issued within this window.
+_LIST_INSTANCES_CACHE_TTL_SECONDS = 1.5
 _GET_INTERNAL_IP_CMD = 'ip -4 -br addr show | grep -Eo "10\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)"'
 
 logger = logging.getLogger(__name__)
 
 
-def synchronized(f):
-
-    def wrapper(self, *args, **kwargs):
-        self.lock.acquire()
-        try:
-            return f(self, *args, **kwargs)
-        finally:
-            self.lock.release()
-
-    return wrapper
-
-
 class LambdaNodeProvider(NodeProvider):
     """Node Provider for Lambda Cloud.
 
@@ -52,9 +43,19 @@ class LambdaNodeProvider(NodeProvider):
     def __init__(self, provider_config: Dict[str, Any],
                  cluster_name: str) -> None:
         NodeProvider.__init__(self, provider_config, cluster_name)
-        self.lock = RLock()
+        # Guards the metadata file and the node/instance caches. API calls
+        # and ssh commands are issued outside of it.
+        self.lock = threading.Lock()
         self.lambda_client = lambda_utils.LambdaCloudClient()
         self.cached_nodes: Dict[str, Dict[str, Any]] = {}
+        self._cached_vms: Optional[List[Dict[str, Any]]] = None
+        self._cached_vms_timestamp = 0.0
+        # Bumped whenever nodes are created or terminated, so that a
+        # list_instances() response fetched concurrently is not cached.
+        self._vms_cache_generation = 0
+        # (node id, external ip) -> internal ip. The internal ip of a node
+        # does not change while it is up, so only ssh once per node.
+        self._cached_internal_ips: Dict[Tuple[str, str], str] = {}
         self.metadata = lambda_utils.Metadata(_TAG_PATH_PREFIX, cluster_name)
         self.ssh_key_path = os.path.expanduser(auth.PRIVATE_SSH_KEY_PATH)
 
@@ -125,26 +126,56 @@ class LambdaNodeProvider(NodeProvider):
     def _list_instances_in_cluster(self) -> List[Dict[str, Any]]:
         """List running instances in cluster."""
         vms = self.lambda_client.list_instances()
-        possible_names = [
+        possible_names = {
             f'{self.cluster_name}-head', f'{self.cluster_name}-worker'
-        ]
+        }
         return [node for node in vms if node.get('name') in possible_names]
 
-    @synchronized
-    def _get_filtered_nodes(self, tag_filters: Dict[str,
-                                                    str]) -> Dict[str, Any]:
-
-        def _extract_metadata(vm: Dict[str, Any]) -> Dict[str, Any]:
-            metadata = {'id': vm['id'], 'status': vm['status'], 'tags': {}}
-            instance_info = self.metadata.get(vm['id'])
-            if instance_info is not None:
-                metadata['tags'] = instance_info['tags']
-            metadata['external_ip'] = vm.get('ip')
-            return metadata
-
-        def _match_tags(vm: Dict[str, Any]):
-            vm_info = self.metadata.get(vm['id'])
-            tags = {} if vm_info is None else vm_info['tags']
+    def _list_instances_in_cluster_cached(
+        self,
+        force_refresh: bool = False
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """List running instances in cluster, reusing a recent response.
+
+        The second return value is True iff the list was fetched by this call
+        and no node was created or terminated meanwhile, i.e. it is safe to
+        prune the metadata of instances missing from the list.
+        """
+        with self.lock:
+            cached_vms = self._cached_vms
+            cached_vms_timestamp = self._cached_vms_timestamp
+            generation = self._vms_cache_generation
+        now = time.monotonic()
+        if (not force_refresh and cached_vms is not None and
+                now - cached_vms_timestamp < _LIST_INSTANCES_CACHE_TTL_SECONDS):
+            return cached_vms, False
+        vms = self._list_instances_in_cluster()
+        with self.lock:
+            if generation != self._vms_cache_generation:
+                return vms, False
+            self._cached_vms = vms
+            self._cached_vms_timestamp = now
+        return vms, True
+
+    def _invalidate_vms_cache(self) -> None:
+        with self.lock:
+            self._cached_vms = None
+            self._vms_cache_generation += 1
+
+    def _get_filtered_nodes(self,
+                            tag_filters: Dict[str, str],
+                            force_refresh: bool = False) -> Dict[str, Any]:
+
+        def _extract_metadata(vm: Dict[str, Any],
+                              tags: Dict[str, str]) -> Dict[str, Any]:
+            return {
+                'id': vm['id'],
+                'status': vm['status'],
+                'tags': tags,
+                'external_ip': vm.get('ip'),
+            }
+
+        def _match_tags(tags: Dict[str, str]):
             for k, v in tag_filters.items():
                 if tags.get(k) != v:
                     return False
@@ -156,6 +187,10 @@ class LambdaNodeProvider(NodeProvider):
             if node['external_ip'] is None:
                 node['internal_ip'] = None
                 return
+            cache_key = (node['id'], node['external_ip'])
+            if cache_key in cached_internal_ips:
+                node['internal_ip'] = cached_internal_ips[cache_key]
+                return
             runner = command_runner.SSHCommandRunner(node['external_ip'],
                                                      'ubuntu',
                                                      self.ssh_key_path)
@@ -169,13 +204,42 @@ class LambdaNodeProvider(NodeProvider):
                 stderr=stdout + stderr)
             node['internal_ip'] = stdout.strip()
 
-        vms = self._list_instances_in_cluster()
-        self.metadata.refresh([node['id'] for node in vms])
-        self._guess_and_add_missing_tags(vms)
-        nodes = [_extract_metadata(vm) for vm in filter(_match_tags, vms)]
+        vms, fetched = self._list_instances_in_cluster_cached(force_refresh)
+        with self.lock:
+            if fetched:
+                # Only prune with a fresh list; a cached one may predate
+                # nodes created since, whose tags must be kept.
+                self.metadata.refresh([node['id'] for node in vms])
+                self._guess_and_add_missing_tags(vms)
+            nodes = []
+            for vm in vms:
+                # Each metadata lookup reads the metadata file, so do it once
+                # per vm for both tag matching and extraction.
+                vm_info = self.metadata.get(vm['id'])
+                tags = {} if vm_info is None else vm_info['tags']
+                if _match_tags(tags):
+                    nodes.append(_extract_metadata(vm, tags))
+            # Workers only read this snapshot; new ips are merged back into
+            # the shared cache under the lock below.
+            cached_internal_ips = dict(self._cached_internal_ips)
         subprocess_utils.run_in_parallel(_get_internal_ip, nodes)
-        self.cached_nodes = {node['id']: node for node in nodes}
-        return self.cached_nodes
+        cached_nodes = {node['id']: node for node in nodes}
+        with self.lock:
+            for node in nodes:
+                if node['internal_ip'] is not None:
+                    self._cached_internal_ips[(
+                        node['id'], node['external_ip'])] = node['internal_ip']
+            self.cached_nodes = cached_nodes
+        return cached_nodes
+
+    def prime_cache(self) -> None:
+        """Refreshes the node cache with a single list_instances() call.
+
+        Callers about to query many nodes (is_running, node_tags,
+        external_ip, ...) should call this once at the start of the batch,
+        so that all of the queries are served from one fresh response.
+        """
+        self._get_filtered_nodes({}, force_refresh=True)
 
     def non_terminated_nodes(self, tag_filters: Dict[str, str]) -> List[str]:
         """Return a list of node ids filtered by the specified tags dict.
@@ -278,36 +342,52 @@ class LambdaNodeProvider(NodeProvider):
                 quantity=1,
                 name=name,
                 ssh_key_name=self.ssh_key_name)[0]
-            self.metadata.set(vm_id, {'tags': config_tags})
+            self._invalidate_vms_cache()
+            with self.lock:
+                self.metadata.set(vm_id, {'tags': config_tags})
             booting_list.append(vm_id)
             time.sleep(10)  # Avoid api rate limits
 
         # Wait for nodes to finish booting
         while True:
             vms = self._list_instances_in_cluster()
-            for vm_id in booting_list.copy():
-                for vm in vms:
-                    if vm['id'] == vm_id and vm['status'] == 'active':
-                        booting_list.remove(vm_id)
+            active_ids = {vm['id'] for vm in vms if vm['status'] == 'active'}
+            booting_list = [
+                vm_id for vm_id in booting_list if vm_id not in active_ids
+            ]
             if len(booting_list) == 0:
                 return
             time.sleep(10)
 
-    @synchronized
     def set_node_tags(self, node_id: str, tags: Dict[str, str]) -> None:
         """Sets the tag values (string dict) for the specified node."""
         node = self._get_node(node_id)
         assert node is not None, node_id
-        node['tags'].update(tags)
-        self.metadata.set(node_id, {'tags': node['tags']})
+        with self.lock:
+            # Re-read the tags under the lock so that concurrent updates to
+            # the same node are merged rather than overwritten.
+            node_info = self.metadata.get(node_id)
+            merged_tags = {} if node_info is None else node_info['tags']
+            merged_tags.update(tags)
+            self.metadata.set(node_id, {'tags': merged_tags})
+            node['tags'] = merged_tags
 
     def terminate_node(self, node_id: str) -> None:
         """Terminates the specified node."""
         self.lambda_client.remove_instances(node_id)
-        self.metadata.set(node_id, None)
+        with self.lock:
+            self.metadata.set(node_id, None)
+            self._cached_internal_ips = {
+                k: v for k, v in self._cached_internal_ips.items()
+                if k[0] != node_id
+            }
+        self._invalidate_vms_cache()
 
     def _get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
-        self._get_filtered_nodes({})  # Side effect: updates cache
+        # Side effect: updates cache. Reuses a recent list_instances()
+        # response, so querying many nodes costs at most one API call per
+        # cache window.
+        self._get_filtered_nodes({})
         return self.cached_nodes.get(node_id, None)
 
     def _get_cached_node(self, node_id: str) -> Optional[Dict[str, Any]]:
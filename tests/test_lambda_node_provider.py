@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from ray.autoscaler.tags import (
+    NODE_KIND_WORKER,
+    TAG_RAY_NODE_KIND,
+    TAG_RAY_USER_NODE_TYPE,
+)
+
+from sky.skylet.providers.lambda_cloud import lambda_utils
+from sky.skylet.providers.lambda_cloud import node_provider
+
+CLUSTER_NAME = 'test-cluster'
+
+
+class _FakeLambdaCloudClient:
+    """In-memory stand-in for lambda_utils.LambdaCloudClient."""
+
+    def __init__(self) -> None:
+        self.instances: List[Dict[str, Any]] = []
+        self.list_calls = 0
+
+    def get_unique_ssh_key_name(self, prefix: str,
+                                pub_key: str) -> Tuple[str, bool]:
+        del pub_key  # unused
+        return prefix, True
+
+    def list_instances(self) -> List[Dict[str, Any]]:
+        self.list_calls += 1
+        return [dict(vm) for vm in self.instances]
+
+    def create_instances(self, instance_type: str, region: str, quantity: int,
+                         name: str, ssh_key_name: str) -> List[str]:
+        del instance_type, region, quantity, ssh_key_name  # unused
+        vm_id = f'vm-{len(self.instances)}'
+        # No ip, so that the provider does not ssh into the node.
+        self.instances.append({
+            'id': vm_id,
+            'name': name,
+            'status': 'active',
+            'ip': None
+        })
+        return [vm_id]
+
+
+@pytest.fixture
+def lambda_client(monkeypatch, tmp_path) -> _FakeLambdaCloudClient:
+    client = _FakeLambdaCloudClient()
+    monkeypatch.setattr(lambda_utils, 'LambdaCloudClient', lambda: client)
+    monkeypatch.setattr(node_provider, '_TAG_PATH_PREFIX',
+                        str(tmp_path / 'metadata'))
+    monkeypatch.setattr(node_provider, '_REMOTE_RAY_YAML',
+                        str(tmp_path / 'does_not_exist.yaml'))
+    public_key_path = tmp_path / 'sky-key.pub'
+    public_key_path.write_text('ssh-rsa AAAA test')
+    monkeypatch.setattr('sky.authentication.PUBLIC_SSH_KEY_PATH',
+                        str(public_key_path))
+    monkeypatch.setattr('sky.utils.common_utils.get_user_hash',
+                        lambda: 'abcd1234')
+    monkeypatch.setattr(node_provider.time, 'sleep', lambda _: None)
+    return client
+
+
+def _make_provider() -> node_provider.LambdaNodeProvider:
+    return node_provider.LambdaNodeProvider({'region': 'us-east-1'},
+                                            CLUSTER_NAME)
+
+
+def test_list_instances_cached_within_ttl(lambda_client) -> None:
+    provider = _make_provider()
+    provider.non_terminated_nodes({})
+    provider.non_terminated_nodes({})
+    provider.is_running('vm-does-not-exist')
+    assert lambda_client.list_calls == 1
+
+    provider.prime_cache()
+    assert lambda_client.list_calls == 2
+
+
+def test_cache_hit_does_not_prune_metadata(lambda_client) -> None:
+    provider = _make_provider()
+    provider.non_terminated_nodes({})  # Caches an empty instance list.
+
+    # A node created by another thread, not yet in the cached list.
+    lambda_client.instances.append({
+        'id': 'vm-new',
+        'name': f'{CLUSTER_NAME}-worker',
+        'status': 'active',
+        'ip': None
+    })
+    tags = {TAG_RAY_NODE_KIND: NODE_KIND_WORKER, TAG_RAY_USER_NODE_TYPE: 'gpu'}
+    provider.metadata.set('vm-new', {'tags': tags})
+
+    provider.non_terminated_nodes({})
+    assert lambda_client.list_calls == 1
+    assert provider.metadata.get('vm-new') == {'tags': tags}
+
+
+def test_create_then_query_keeps_tags(lambda_client, monkeypatch) -> None:
+    provider = _make_provider()
+    provider.non_terminated_nodes({})  # Caches an empty instance list.
+
+    # Simulate the autoscaler thread querying nodes while create_node waits
+    # between launches.
+    monkeypatch.setattr(node_provider.time, 'sleep',
+                        lambda _: provider.non_terminated_nodes({}))
+    provider.create_node({'InstanceType': 'gpu_1x_a10'}, {
+        TAG_RAY_NODE_KIND: NODE_KIND_WORKER,
+        TAG_RAY_USER_NODE_TYPE: 'gpu',
+    }, 1)
+
+    assert provider.non_terminated_nodes({}) == ['vm-0']
+    assert provider.node_tags('vm-0')[TAG_RAY_USER_NODE_TYPE] == 'gpu'